@@ -1,12 +1,16 @@
 import streamlit as st
+import pandas as pd
 import plotly.express as px
 
+import hashlib
 import io
+import os
 import tempfile
+import time
 import zipfile
 from pathlib import Path
 
-from src.etl import load_payments_folders
+from src.etl import folder_signature, load_payments_folders
 from src.forecast import prepare_series, forecast_holt_winters, forecast_sarima
 
 st.set_page_config(page_title="Pagos - Forecast", layout="wide")
@@ -36,7 +40,8 @@ if zip_file is None:
 zip_bytes = zip_file.getvalue()
 
 # Creamos el tmpdir una sola vez por sesión/ZIP (si cambia el ZIP, recreamos)
-zip_signature = (zip_file.name, len(zip_bytes))
+# Hash del contenido: detecta un ZIP distinto aunque tenga el mismo nombre y tamaño
+zip_signature = (zip_file.name, hashlib.blake2b(zip_bytes, digest_size=16).hexdigest())
 
 if st.session_state.get("zip_signature") != zip_signature:
     # Limpia tmpdir anterior
@@ -52,7 +57,13 @@ if st.session_state.get("zip_signature") != zip_signature:
 
     # 👇 IMPORTANTE: BytesIO
     with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as z:
-        z.extractall(tmp_path)
+        for info in z.infolist():
+            target = z.extract(info, tmp_path)
+            # extract pone la hora actual: se restaura la del ZIP para que volver a
+            # subir el mismo ZIP dé la misma firma y se reuse el snapshot del ETL
+            if not info.is_dir():
+                ts = time.mktime(info.date_time + (0, 0, -1))
+                os.utime(target, (ts, ts))
 
     st.session_state["_tmpdir"] = tmpdir
     st.session_state["tmp_path"] = str(tmp_path)
@@ -60,12 +71,19 @@ if st.session_state.get("zip_signature") != zip_signature:
 
 tmp_path = Path(st.session_state["tmp_path"])
 
-# Detectar carpetas 2024 y 2025 (en cualquier nivel)
-year_folders = []
-for year in ["2024", "2025"]:
-    found = [p for p in tmp_path.rglob(year) if p.is_dir() and p.name == year]
-    if found:
-        year_folders.append(found[0])
+# Detectar carpetas 2024 y 2025 (en cualquier nivel) en un solo recorrido
+YEARS = ["2024", "2025"]
+found = {}
+for root, dirs, _ in os.walk(tmp_path):
+    for d in dirs:
+        if d in YEARS and d not in found:
+            found[d] = Path(root) / d
+    if len(found) == len(YEARS):
+        break
+    # No bajamos dentro de una carpeta de año: ahí solo hay meses/días con Excel
+    dirs[:] = [d for d in dirs if d not in YEARS]
+
+year_folders = [found[y] for y in YEARS if y in found]
 
 if not year_folders:
     st.error("No encontré carpetas '2024' o '2025' dentro del ZIP. Revisa la estructura (deben ser carpetas con ese nombre).")
@@ -74,7 +92,14 @@ if not year_folders:
 # -----------------------------
 # Cargar datos (multi-año)
 # -----------------------------
-df = load_payments_folders(year_folders)
+@st.cache_data(show_spinner=True)
+def load_data_cached(sig: tuple):
+    # sig incluye (n_archivos, max_mtime, tamaño) por carpeta: si cambian los Excel, se recarga
+    return load_payments_folders([Path(p) for p, *_ in sig])
+
+
+sig = tuple((str(p), *folder_signature(p)) for p in year_folders)
+df = load_data_cached(sig)
 
 if df.empty:
     st.warning("No se encontraron datos. Revisa que los Excel tengan la hoja 'RESUMEN' y la fila 'TOTAL A PAGAR'.")
@@ -92,7 +117,8 @@ MAP_DIAS = {
     "Saturday": "Sábado",
     "Sunday": "Domingo",
 }
-df["DiaNombre_ES"] = df["DiaNombre"].map(MAP_DIAS)
+# DiaNombre es categórica: renombrar sus (<= 7) categorías en lugar de mapear cada fila
+df["DiaNombre_ES"] = df["DiaNombre"].cat.rename_categories(MAP_DIAS)
 
 # -----------------------------
 # Filtros (sin moneda)
@@ -108,10 +134,37 @@ with st.sidebar:
     banco_sel = st.multiselect("Banco", bancos, default=default_banco)
     dia_sel = st.multiselect("Día de la semana", dias, default=default_dia)
 
-dff_base = df[
-    df["BANCO"].isin(banco_sel)
-    & df["DiaNombre_ES"].isin(dia_sel)
-].copy()
+# -----------------------------
+# Filtro + agregado (cacheado por combinación de filtros)
+# -----------------------------
+@st.cache_data
+def filter_summary(_df, sig: tuple, bancos: tuple, dias: tuple, moneda: str):
+    # _df no se hashea: sig ya identifica los datos cargados
+    # BANCO / DiaNombre son categóricas: isin compara códigos, no strings
+    mask = (
+        _df["BANCO"].isin(bancos).to_numpy()
+        & _df["DiaNombre_ES"].isin(dias).to_numpy()
+        & (_df["MONEDA"] == moneda).to_numpy()
+    )
+    dff = _df[mask]
+
+    # df ya viene ordenado por FECHA desde el ETL: no hace falta reordenar
+    ts = dff.groupby("FECHA", sort=False)["Valor"].sum().reset_index()
+    sample = dff[["FECHA", "BANCO", "MONEDA", "Valor", "DiaNombre_ES"]].tail(15)
+    return ts, len(dff), dff["Valor"].sum(), sample
+
+
+# -----------------------------
+# Payload de gráficos
+# -----------------------------
+# Un gráfico típico no muestra más puntos que esto; por encima se agrega a semanal
+MAX_PLOT_POINTS = 1000
+
+
+def slim_for_plot(d: pd.DataFrame) -> pd.DataFrame:
+    # Menos bytes hacia el navegador: fechas ISO y montos float32 (solo para dibujar)
+    return d.assign(FECHA=d["FECHA"].dt.strftime("%Y-%m-%d"), Monto=d["Monto"].astype("float32"))
+
 
 # -----------------------------
 # Panel por moneda
@@ -119,25 +172,32 @@ dff_base = df[
 def render_panel(moneda: str):
     st.subheader(f"💱 {moneda}")
 
-    dff = dff_base[dff_base["MONEDA"] == moneda].copy()
+    ts, n_rows, total, sample = filter_summary(
+        df, sig, tuple(sorted(banco_sel)), tuple(sorted(dia_sel)), moneda
+    )
 
     c1, c2 = st.columns([2, 1])
 
     with c1:
-        ts = dff.groupby("FECHA")["Valor"].sum().reset_index().sort_values("FECHA")
         ts["Monto"] = -ts["Valor"]
-        fig = px.line(ts, x="FECHA", y="Monto", title=f"Histórico ({moneda}) — egresos en positivo")
+        hist_ts = ts[["FECHA", "Monto"]]
+        title = f"Histórico ({moneda}) — egresos en positivo"
+        if len(hist_ts) > MAX_PLOT_POINTS:
+            hist_ts = hist_ts.resample("W", on="FECHA").sum().reset_index()
+            title += " (semanal)"
+        fig = px.line(slim_for_plot(hist_ts), x="FECHA", y="Monto", title=title)
         st.plotly_chart(fig, use_container_width=True)
 
     with c2:
-        st.metric("Registros (filtrados)", len(dff))
-        st.metric("Suma total (filtrada)", f"{(-dff['Valor'].sum()):,.2f}")
+        st.metric("Registros (filtrados)", n_rows)
+        st.metric("Suma total (filtrada)", f"{(-total):,.2f}")
         st.write("Muestra (formato largo):")
-        st.dataframe(dff.sort_values("FECHA").tail(15), use_container_width=True)
+        st.dataframe(sample, use_container_width=True)
 
     st.markdown("### 🔮 Forecast")
 
-    series = prepare_series(dff, freq="D")
+    # ts ya está agregado por FECHA: prepare_series solo cambia signo y reindexa
+    series = prepare_series(ts, freq="D")
     if len(series) < 8:
         st.info("Muy pocos puntos para forecast estable con estos filtros.")
         return
@@ -155,7 +215,7 @@ def render_panel(moneda: str):
     pred.columns = ["FECHA", "Monto"]
     pred["Tipo"] = "Forecast"
 
-    plot_df = hist._append(pred, ignore_index=True)
+    plot_df = slim_for_plot(pd.concat([hist, pred], ignore_index=True))
     fig2 = px.line(plot_df, x="FECHA", y="Monto", color="Tipo", title=f"Forecast ({moneda}) — {model_name}")
     st.plotly_chart(fig2, use_container_width=True)
 
@@ -1,8 +1,33 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import pickle
 import re
+import tempfile
+from collections import deque
+from contextlib import closing
+from functools import lru_cache
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from itertools import accumulate
+from operator import itemgetter
 from pathlib import Path
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # sin calamine se lee con openpyxl en modo read_only (solo .xlsx)
+    CalamineWorkbook = None
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba es opcional: sin él se usa el camino pandas
+    njit = None
+    prange = range
 
 BANKS_ALLOWED = {"BCP", "SCOTIABANK", "SANTANDER", "INTERBANK", "TOTAL"}
 CCY_ALLOWED = {"PEN", "USD"}
@@ -15,83 +40,265 @@ FINAL_COLS = [
     "TOTAL_PEN", "TOTAL_USD",
 ]
 
+LONG_COLS = ["FECHA", "BANCO", "MONEDA", "Valor", "DiaNombre"]
+
+# "BCP_PEN" -> ("BCP", "PEN"): se conoce de antemano, como códigos categóricos por columna
+_BANK_CODES, _BANK_CATS = pd.factorize(pd.Series([c.split("_")[0] for c in FINAL_COLS]), sort=True)
+_CCY_CODES, _CCY_CATS = pd.factorize(pd.Series([c.split("_")[1] for c in FINAL_COLS]), sort=True)
+
+_DATE_RE = re.compile(r"(\d{2})\.(\d{2})\.(\d{4})")
+
+# Cache en disco de filas ya parseadas: {(ruta, mtime_ns, size): dict wide | None}
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+ROWS_CACHE_PATH = CACHE_DIR / "etl_rows.pkl"
+
+# Versión del parseo: subirla cuando cambie lo que devuelven _read_total_a_pagar_wide,
+# _header_col o _iter_sheet_rows, o el formato largo (_rows_to_long / LONG_COLS);
+# un cache o snapshot de otra versión se descarta entero
+_ROWS_CACHE_VERSION = 2
+
+# Resultado de un archivo que no se pudo leer en esta corrida (bloqueado, placeholder
+# de OneDrive sin descargar...): se omite pero NO se guarda en el cache de filas
+_READ_ERROR = "READ_ERROR"
+
+# Snapshot del resultado final de load_payments_folders + la firma que lo generó
+SNAPSHOT_PATH = CACHE_DIR / "payments.parquet"
+SNAPSHOT_SIG_PATH = CACHE_DIR / "payments.sig.json"
+
+# Por debajo de esto, levantar procesos cuesta más que parsear: se usan hilos
+PROCESS_POOL_MIN_FILES = 8
+
+# Celdas de texto (las que pd.to_numeric no convierte) a partir de las cuales
+# compensa el parser JIT frente a la limpieza con .str
+NUMBA_MIN_CELLS = 200_000
+
+# Ancho máximo de celda que va al buffer del JIT (el buffer toma el ancho de la
+# más larga); un monto con más caracteres tampoco se resolvería exacto
+NUMBA_MAX_CHARS = 32
+
 
-def _extract_date_from_path(path: Path) -> pd.Timestamp | None:
-    m = re.search(r"(\d{2})\.(\d{2})\.(\d{4})", str(path))
+def _extract_date_from_path(path: Path) -> datetime | None:
+    # datetime plano por archivo; la conversión a datetime64 se hace una sola vez en _rows_to_long
+    m = _DATE_RE.search(str(path))
     if not m:
         return None
-    dd, mm, yyyy = m.group(1), m.group(2), m.group(3)
-    return pd.to_datetime(f"{dd}/{mm}/{yyyy}", dayfirst=True, errors="coerce")
+    try:
+        return datetime(int(m[3]), int(m[2]), int(m[1]))
+    except ValueError:
+        return None
+
+
+def _parse_money_bytes(buf: np.ndarray) -> np.ndarray:
+    """
+    Parser de montos sobre un buffer ASCII (n, ancho) de uint8, rellenado con 0.
+    Solo resuelve decimales simples (espacios, signo, ',' de miles, '.', exponente)
+    cuando el resultado es exacto; todo lo demás ('-', '', 'inf', mantisas de más
+    de 15-16 dígitos...) queda NaN y lo decide la limpieza pandas de
+    _coerce_money_cols. Se compila con numba si está; cada fila es independiente
+    y con numba se reparten entre hilos (prange).
+    """
+    n, width = buf.shape
+    out = np.full(n, np.nan)
+    for i in prange(n):
+        j = 0
+        while j < width and buf[i, j] == 32:  # ' '
+            j += 1
+
+        neg = False
+        if j < width and (buf[i, j] == 45 or buf[i, j] == 43):  # '-' / '+'
+            neg = buf[i, j] == 45
+            j += 1
+
+        mant = 0.0
+        ndig = 0
+        scale = 0
+        exp = 0
+        seen_dot = False
+        ok = True
+        while j < width:
+            c = buf[i, j]
+            if 48 <= c <= 57:
+                mant = mant * 10.0 + (c - 48)
+                ndig += 1
+                if seen_dot:
+                    scale += 1
+            elif c == 44:  # ','
+                pass
+            elif c == 46 and not seen_dot:  # '.'
+                seen_dot = True
+            elif (c == 101 or c == 69) and ndig > 0:  # 'e' / 'E' (repr de floats grandes)
+                j += 1
+                exp_neg = False
+                if j < width and (buf[i, j] == 45 or buf[i, j] == 43):
+                    exp_neg = buf[i, j] == 45
+                    j += 1
+                exp_dig = 0
+                while j < width and 48 <= buf[i, j] <= 57:
+                    exp = exp * 10 + (buf[i, j] - 48)
+                    exp_dig += 1
+                    j += 1
+                if exp_dig == 0:
+                    ok = False
+                if exp_neg:
+                    exp = -exp
+                break
+            else:
+                break
+            j += 1
+
+        # Lo que queda solo puede ser espacios o relleno
+        while ok and j < width:
+            if buf[i, j] != 32 and buf[i, j] != 0:
+                ok = False
+            j += 1
+
+        if not ok or ndig == 0:
+            continue
+
+        # Mantisa entera exacta (< 2**53) y potencia de 10 exacta (|p| <= 22):
+        # una sola operación redondeada, igual que el parser de pandas
+        p = exp - scale
+        if mant >= 9007199254740992.0 or p > 22 or p < -22:
+            continue
+        v = mant * 10.0 ** p if p >= 0 else mant / 10.0 ** (-p)
+        out[i] = -v if neg else v
+    return out
 
 
-def _coerce_money(x) -> float:
-    if pd.isna(x):
-        return 0.0
-    s = str(x).strip()
-    if s in {"-", ""}:
-        return 0.0
-    s = s.replace(",", "")
+_parse_money_jit = njit(cache=True, parallel=True)(_parse_money_bytes) if njit is not None else None
+
+
+def _coerce_money_cols(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    """
+    Limpieza vectorizada de montos: quita separador de miles y lleva
+    '-', '', NaN y texto no numérico a 0.0.
+    """
+    # Un solo pase sobre el bloque 2-D aplanado; las celdas numéricas (la mayoría)
+    # se convierten directo y solo el texto que no parsea pasa por la limpieza
+    flat = pd.Series(df[cols].to_numpy(dtype=object).ravel())
+    num = pd.to_numeric(flat, errors="coerce")
+    miss = num.isna()
+    if miss.any():
+        text = flat[miss].astype(str)
+        short = text.str.len().to_numpy() <= NUMBA_MAX_CHARS
+        if _parse_money_jit is not None and short.sum() >= NUMBA_MIN_CELLS:
+            try:
+                # numba maneja mal str: se pasa un buffer ASCII de ancho fijo.
+                # Las celdas largas (notas) quedan fuera: inflarían el buffer entero
+                raw = text[short].to_numpy().astype("S")
+            except UnicodeEncodeError:
+                raw = None
+            if raw is not None:
+                parsed = _parse_money_jit(raw.view(np.uint8).reshape(len(raw), -1))
+                num[text.index[short]] = parsed
+                # Lo que el JIT no resolvió con exactitud sigue a la limpieza pandas
+                unresolved = ~short
+                unresolved[short] = np.isnan(parsed)
+                text = text[unresolved]
+
+        cleaned = text.str.strip().str.replace(",", "", regex=False)
+        num[cleaned.index] = pd.to_numeric(cleaned, errors="coerce")
+
+    df[cols] = num.fillna(0.0).to_numpy(dtype=np.float64).reshape(len(df), len(cols))
+    return df
+
+
+def _is_total_label(v) -> bool:
+    return isinstance(v, str) and v.strip().upper() == "TOTAL A PAGAR"
+
+
+def _ffill(row) -> list:
+    # Equivalente a Series.ffill() sobre una tupla: las celdas combinadas llegan vacías
+    return list(accumulate(row, lambda prev, cur: prev if cur is None or cur == "" else cur))
+
+
+@lru_cache(maxsize=1024)
+def _header_col(bank_txt: str, ccy_txt: str) -> str | None:
+    """
+    ('SCOTIABANK S.A.', 'usd') -> 'SCOTIABANK_USD'; None si no es columna de interés.
+    Los headers se repiten en todos los archivos: cada par se normaliza una sola vez.
+    """
+    bank = bank_txt.strip().upper()
+    ccy = ccy_txt.strip().upper()
+
+    # Normalizaciones típicas
+    bank = bank.replace("\n", " ")
+    ccy = ccy.replace("\n", " ")
+
+    # Aceptar bancos aunque vengan con extra texto (ej: "SCOTIABANK S.A.")
+    if "BCP" in bank:
+        bank = "BCP"
+    elif "SCOTIABANK" in bank:
+        bank = "SCOTIABANK"
+    elif "SANTANDER" in bank:
+        bank = "SANTANDER"
+    elif "INTERBANK" in bank:
+        bank = "INTERBANK"
+    elif "TOTAL" in bank:
+        bank = "TOTAL"
+
+    if bank in BANKS_ALLOWED and ccy in CCY_ALLOWED:
+        return f"{bank}_{ccy}"
+    return None
+
+
+def _iter_sheet_rows(xlsx_path: Path, sheet_name: str):
+    """
+    Filas de la hoja como tuplas de valores: calamine (Rust) si está instalado,
+    si no openpyxl read_only. Usar con closing() para liberar el archivo al cortar.
+    """
+    if CalamineWorkbook is not None:
+        with CalamineWorkbook.from_path(str(xlsx_path)) as wb:
+            yield from wb.get_sheet_by_name(sheet_name).iter_rows()
+        return
+
+    wb = load_workbook(xlsx_path, read_only=True, data_only=True)
     try:
-        return float(s)
-    except ValueError:
-        return 0.0
+        yield from wb[sheet_name].iter_rows(values_only=True)
+    finally:
+        wb.close()
 
 
-def _read_total_a_pagar_wide(xlsx_path: Path, sheet_name: str = "RESUMEN") -> dict | None:
+def _read_total_a_pagar_wide(xlsx_path: Path, sheet_name: str = "RESUMEN") -> dict | str | None:
     """
-    Lee 'RESUMEN' y devuelve dict wide (BCP_PEN, ..., TOTAL_USD),
-    robusto a celdas combinadas (merge) usando forward-fill en headers.
+    Lee 'RESUMEN' fila a fila hasta 'TOTAL A PAGAR' y devuelve dict wide
+    (BCP_PEN, ..., TOTAL_USD), robusto a celdas combinadas (merge) usando
+    forward-fill en headers. No arma DataFrame: solo guarda las últimas 3 filas.
+    None si el archivo no tiene la hoja/fila; _READ_ERROR si falló la lectura (I/O).
     """
     try:
-        df = pd.read_excel(xlsx_path, sheet_name=sheet_name, header=None, engine="openpyxl")
+        with closing(_iter_sheet_rows(xlsx_path, sheet_name)) as rows:
+            last_rows = deque(maxlen=3)  # (header banco, header moneda, valores)
+            for row in rows:
+                last_rows.append(row)
+                if any(_is_total_label(v) for v in row):
+                    break
+            else:
+                return None
+    except OSError:
+        # Error de I/O (bloqueo, archivo aún sincronizando): puede ser pasajero
+        return _READ_ERROR
     except Exception:
         return None
 
-    mask = df.apply(
-        lambda r: r.astype(str).str.strip().str.upper().eq("TOTAL A PAGAR").any(),
-        axis=1
-    )
-    if not mask.any():
-        return None
-
-    row_idx = df.index[mask][0]
-    if row_idx < 2:
+    if len(last_rows) < 3:
         return None
 
-    hdr_bank = df.loc[row_idx - 2].copy()
-    hdr_ccy = df.loc[row_idx - 1].copy()
-    values = df.loc[row_idx]
+    # openpyxl read_only sin <dimension> entrega filas de distinto largo (cortadas en
+    # la última celda no vacía): se completan con None antes del forward-fill
+    width = max(map(len, last_rows))
+    hdr_bank, hdr_ccy, values = (tuple(r) + (None,) * (width - len(r)) for r in last_rows)
 
     # ✅ Forward-fill para headers con celdas combinadas
-    hdr_bank = hdr_bank.ffill()
-    hdr_ccy = hdr_ccy.ffill()
+    hdr_bank = _ffill(hdr_bank)
+    hdr_ccy = _ffill(hdr_ccy)
 
     wide = {}
-    for col in df.columns:
-        bank_raw = hdr_bank[col]
-        ccy_raw = hdr_ccy[col]
-
-        bank = str(bank_raw).strip().upper()
-        ccy = str(ccy_raw).strip().upper()
-
-        # Normalizaciones típicas
-        bank = bank.replace("\n", " ")
-        ccy = ccy.replace("\n", " ")
-
-        # Aceptar bancos aunque vengan con extra texto (ej: "SCOTIABANK S.A.")
-        if "BCP" in bank:
-            bank = "BCP"
-        elif "SCOTIABANK" in bank:
-            bank = "SCOTIABANK"
-        elif "SANTANDER" in bank:
-            bank = "SANTANDER"
-        elif "INTERBANK" in bank:
-            bank = "INTERBANK"
-        elif "TOTAL" in bank:
-            bank = "TOTAL"
-
-        if bank in BANKS_ALLOWED and ccy in CCY_ALLOWED:
-            wide[f"{bank}_{ccy}"] = _coerce_money(values[col])
+    for bank_raw, ccy_raw, value in zip(hdr_bank, hdr_ccy, values):
+        col = _header_col(str(bank_raw), str(ccy_raw))
+        if col is not None:
+            # Valor crudo: se limpia vectorizado en _rows_to_long
+            wide[col] = value
 
     # Si no detectó nada, devolvemos None para que NO rellene con ceros silenciosamente
     if not wide:
@@ -103,48 +310,270 @@ def _read_total_a_pagar_wide(xlsx_path: Path, sheet_name: str = "RESUMEN") -> di
     return wide
 
 
+def _process_file(path: Path) -> dict | str | None:
+    """
+    Worker por archivo: fecha desde la ruta + fila 'TOTAL A PAGAR' en wide.
+    Vive a nivel de módulo para poder enviarse al ProcessPoolExecutor.
+    """
+    fecha = _extract_date_from_path(path)
+    if fecha is None:
+        return None
 
-def load_payments_folder(base_folder: str | Path) -> pd.DataFrame:
-    base = Path(base_folder)
-    files = [p for p in base.rglob("*.xlsx") if not p.name.startswith("~$")]
+    wide_vals = _read_total_a_pagar_wide(path, sheet_name="RESUMEN")
+    if wide_vals is None or wide_vals == _READ_ERROR:
+        return wide_vals
 
-    rows = []
-    for f in files:
-        fecha = _extract_date_from_path(f)
-        if fecha is None or pd.isna(fecha):
+    wide_vals["FECHA"] = fecha
+    return wide_vals
+
+
+def _iter_excel_files(base: Path):
+    """
+    Recorre base con os.scandir (usa el tipo cacheado de cada entrada, sin stat
+    extra) y filtra por nombre antes de crear el Path. Omite temporales '~$'.
+    """
+    # .xlsb (binario) solo lo lee calamine; openpyxl no lo soporta
+    suffixes = (".xlsx", ".xlsb") if CalamineWorkbook is not None else (".xlsx",)
+    stack = [str(base)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            # Carpeta inexistente o sin permisos: se omite (como rglob), no se aborta
             continue
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif e.name.lower().endswith(suffixes) and not e.name.startswith("~$"):
+                    yield Path(e.path)
+
 
-        wide_vals = _read_total_a_pagar_wide(f, sheet_name="RESUMEN")
-        if wide_vals is None:
+def _list_excel_files(base: Path) -> list[Path]:
+    return list(_iter_excel_files(base))
+
+
+def _files_signature(files: list[Path]) -> tuple[int, int, int]:
+    n, max_mtime, total = 0, 0, 0
+    for f in files:
+        try:
+            st = f.stat()
+        except OSError:
+            # Desapareció entre el listado y el stat: se omite
             continue
+        n += 1
+        max_mtime = max(max_mtime, st.st_mtime_ns)
+        total += st.st_size
+    return n, max_mtime, total
+
+
+def folder_signature(base_folder: str | Path) -> tuple[int, int, int]:
+    """
+    (n_archivos, max mtime_ns, tamaño total) de los Excel de la carpeta.
+    Barato de calcular (solo stat) y cambia si se agrega o modifica un archivo.
+    """
+    return _files_signature(_list_excel_files(Path(base_folder)))
+
+
+def _file_key(path: Path) -> tuple[str, int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return str(path.resolve()), st.st_mtime_ns, st.st_size
 
-        wide_vals["FECHA"] = fecha
-        rows.append(wide_vals)
 
+def _load_rows_cache() -> dict:
+    try:
+        with open(ROWS_CACHE_PATH, "rb") as fh:
+            version, cache = pickle.load(fh)
+    except Exception:
+        return {}
+    return cache if version == _ROWS_CACHE_VERSION else {}
+
+
+def _atomic_write(path: Path, write) -> None:
+    """
+    Escribe a un temporal del mismo directorio y lo renombra sobre path: quien
+    lee ve el archivo anterior o el nuevo completo, nunca uno a medio escribir.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _save_rows_cache(cache: dict) -> None:
+    # Descarta entradas de archivos que ya no existen (p.ej. tmpdirs de ZIPs viejos)
+    cache = {k: v for k, v in cache.items() if os.path.exists(k[0])}
+    try:
+        _atomic_write(
+            ROWS_CACHE_PATH,
+            lambda fh: pickle.dump((_ROWS_CACHE_VERSION, cache), fh, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+    except OSError:
+        pass
+
+
+def _make_executor(files: list[Path]) -> Executor:
+    # En carpetas sincronizadas (OneDrive) domina la latencia de abrir cada archivo,
+    # no el parseo: conviene solapar I/O con hilos en vez de procesos
+    if any("OneDrive" in str(f) for f in files):
+        return ThreadPoolExecutor(max_workers=16)
+    # Pocos archivos (típico: solo cambió el del día): no vale el spawn de procesos
+    if len(files) < PROCESS_POOL_MIN_FILES:
+        return ThreadPoolExecutor(max_workers=len(files))
+    return ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
+def _parse_files(files: list[Path]) -> list[dict]:
+    """
+    Parsea los Excel en paralelo (descomprimir + parsear XML es CPU-bound;
+    en OneDrive, I/O-bound). Solo se parsean los archivos nuevos o
+    modificados; el resto sale del cache.
+    """
+    if not files:
+        return []
+
+    cache = _load_rows_cache()
+    # Un archivo que desapareció entre el listado y el stat se omite
+    keyed = [(k, f) for k, f in ((_file_key(f), f) for f in files) if k is not None]
+    pending = [(k, f) for k, f in keyed if k not in cache]
+
+    if pending:
+        todo = [f for _, f in pending]
+        with _make_executor(todo) as ex:
+            parsed = ex.map(_process_file, todo, chunksize=4)
+            for (k, _), row in zip(pending, parsed):
+                if row == _READ_ERROR:
+                    # No se cachea: se reintenta en la próxima corrida
+                    continue
+                cache[k] = row
+        _save_rows_cache(cache)
+
+    return [cache[k] for k, _ in keyed if cache.get(k) is not None]
+
+
+def _rows_to_long(rows: list[dict]) -> pd.DataFrame:
     if not rows:
-        return pd.DataFrame(columns=["FECHA", "BANCO", "MONEDA", "Valor", "DiaNombre"])
+        return pd.DataFrame(columns=LONG_COLS)
+
+    # Bloque 2-D (N, 10) + columna de fechas: evita el camino lento de DataFrame(list[dict]).
+    # Un solo recorrido de rows; itemgetter saca las 10 columnas de cada dict en C
+    get_vals = itemgetter(*FINAL_COLS)
+    vals = np.empty((len(rows), len(FINAL_COLS)), dtype=object)
+    fechas = [None] * len(rows)
+    for i, r in enumerate(rows):
+        vals[i] = get_vals(r)
+        fechas[i] = r["FECHA"]
+
+    wide_df = pd.DataFrame(vals, columns=FINAL_COLS)
+    wide_df.insert(0, "FECHA", pd.to_datetime(fechas))
+    # Orden estable por FECHA una sola vez: los consumidores no necesitan reordenar
+    wide_df = wide_df.sort_values("FECHA", kind="mergesort")
+    wide_df = _coerce_money_cols(wide_df, FINAL_COLS)
+
+    # Formato largo armado directo (sin melt ni split): cada fecha se repite una vez por
+    # columna y BANCO/MONEDA son los mismos códigos en cada bloque.
+    # Pocas etiquetas repetidas miles de veces: categóricas ocupan ~10x menos
+    n, k = len(wide_df), len(FINAL_COLS)
+    return pd.DataFrame({
+        "FECHA": np.repeat(wide_df["FECHA"].to_numpy(), k),
+        "BANCO": pd.Categorical.from_codes(np.tile(_BANK_CODES, n), categories=_BANK_CATS),
+        "MONEDA": pd.Categorical.from_codes(np.tile(_CCY_CODES, n), categories=_CCY_CATS),
+        "Valor": wide_df[FINAL_COLS].to_numpy(dtype=np.float64).reshape(-1),
+        # Un day_name por fecha (no por fila long), replicado
+        "DiaNombre": pd.Categorical(wide_df["FECHA"].dt.day_name()).repeat(k),
+    })
+
+
+def _snapshot_key(base_folders: list[str | Path], files: list[Path]) -> dict:
+    """
+    Firma del snapshot: (ruta relativa, mtime_ns, tamaño) de cada Excel.
+    FECHA sale del nombre del archivo: renombrarlo o moverlo de carpeta debe
+    invalidar el snapshot aunque no cambien conteo, mtimes ni tamaños.
+    Rutas relativas a cada carpeta base: no importa dónde esté descomprimida.
+    """
+    bases = [Path(b) for b in base_folders]
+    entries = []
+    for f in files:
+        try:
+            st = f.stat()
+        except OSError:
+            continue
+        base = next(b for b in bases if f.is_relative_to(b))
+        entries.append((base.name, f.relative_to(base).as_posix(), st.st_mtime_ns, st.st_size))
+
+    h = hashlib.blake2b(digest_size=16)
+    for entry in sorted(entries):
+        h.update(repr(entry).encode("utf-8"))
+    return {
+        "version": _ROWS_CACHE_VERSION,
+        "folders": [b.name for b in bases],
+        "files": h.hexdigest(),
+    }
+
 
-    wide_df = pd.DataFrame(rows).sort_values("FECHA")
+def _load_snapshot(key: dict) -> pd.DataFrame | None:
+    try:
+        # El .sig descarta barato sin abrir el parquet
+        if json.loads(SNAPSHOT_SIG_PATH.read_text(encoding="utf-8")) != key:
+            return None
+        snapshot = pd.read_parquet(SNAPSHOT_PATH)
+    except Exception:
+        return None
+    # La firma guardada dentro del parquet es la que manda: si dos sesiones
+    # escribieron a la vez, el .sig puede ser de una y el parquet de la otra
+    if snapshot.attrs.get("etl_key") != key:
+        return None
+    snapshot.attrs = {}
+    return snapshot
 
-    long_df = wide_df.melt(id_vars=["FECHA"], var_name="Atributo", value_name="Valor")
 
-    long_df[["BANCO", "MONEDA"]] = long_df["Atributo"].str.split("_", n=1, expand=True)
-    long_df = long_df.drop(columns=["Atributo"])
+def _save_snapshot(key: dict, df: pd.DataFrame) -> None:
+    out = df.copy(deep=False)
+    out.attrs = {"etl_key": key}
+    try:
+        # Parquet primero y firma al final, cada uno reemplazado de forma atómica
+        _atomic_write(SNAPSHOT_PATH, lambda fh: out.to_parquet(fh, index=False))
+        _atomic_write(SNAPSHOT_SIG_PATH, lambda fh: fh.write(json.dumps(key).encode("utf-8")))
+    except Exception:
+        pass
 
-    long_df["DiaNombre"] = long_df["FECHA"].dt.day_name()
 
-    return long_df
+def load_payments_folder(base_folder: str | Path) -> pd.DataFrame:
+    files = _list_excel_files(Path(base_folder))
+    return _rows_to_long(_parse_files(files))
 
 
-def load_payments_folders(base_folders: list[str | Path]) -> pd.DataFrame:
-    dfs = []
+def _collect_files(base_folders: list[str | Path]) -> list[Path]:
+    """
+    Un solo listado para todas las carpetas. Si se solapan (la misma carpeta dos
+    veces, o una dentro de otra) cada archivo aparece una sola vez.
+    """
+    files = {}
     for folder in base_folders:
-        df = load_payments_folder(folder)
-        if not df.empty:
-            dfs.append(df)
+        for f in _iter_excel_files(Path(folder)):
+            files.setdefault(os.path.normcase(os.path.abspath(f)), f)
+    return list(files.values())
 
-    if not dfs:
-        return pd.DataFrame(columns=["FECHA", "BANCO", "MONEDA", "Valor", "DiaNombre"])
 
-    out = pd.concat(dfs, ignore_index=True).sort_values("FECHA")
+def load_payments_folders(base_folders: list[str | Path]) -> pd.DataFrame:
+    # Un solo pool y un solo armado del formato largo para todos los años
+    files = _collect_files(base_folders)
+
+    # Si ningún Excel cambió desde la última corrida, el parquet ya es el resultado
+    key = _snapshot_key(base_folders, files)
+    snapshot = _load_snapshot(key)
+    if snapshot is not None:
+        return snapshot
+
+    out = _rows_to_long(_parse_files(files))
+    if not out.empty:
+        _save_snapshot(key, out)
     return out
@@ -1,8 +1,76 @@
 from __future__ import annotations
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
 import pandas as pd
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+# Cache LRU de modelos ya ajustados: el fit es lo caro, forecast(steps) es casi gratis
+FIT_CACHE_SIZE = 64
+_FIT_CACHE: OrderedDict[tuple, object] = OrderedDict()
+_FIT_CACHE_LOCK = threading.Lock()
+
+# Holt-Winters: L-BFGS-B acotado y sin la grilla previa (use_brute) de smoothing params.
+# Los estados iniciales ya parten de initial_values() de statsmodels (calculados de la serie)
+HW_FIT_METHOD = "L-BFGS-B"
+HW_MINIMIZE_KWARGS = {"options": {"maxiter": 200, "ftol": 1e-6}}
+
+
+def clear_forecast_cache() -> None:
+    with _FIT_CACHE_LOCK:
+        _FIT_CACHE.clear()
+
+
+def _series_key(y: pd.Series) -> tuple:
+    """Huella del contenido de la serie (valores + rango de fechas)."""
+    values = np.ascontiguousarray(y.to_numpy(dtype=np.float64))
+    digest = hashlib.blake2b(values.tobytes(), digest_size=16).hexdigest()
+    return digest, len(y), str(y.index[0]), str(y.index[-1]), getattr(y.index, "freqstr", None)
+
+
+def _cached_fit(key: tuple, fit: Callable[[], object], cache_dir: str | Path | None = None):
+    """
+    Devuelve el modelo ajustado para key: primero memoria, luego cache_dir
+    (si se pasa, persiste entre sesiones) y recién ahí ajusta.
+    """
+    with _FIT_CACHE_LOCK:
+        if key in _FIT_CACHE:
+            _FIT_CACHE.move_to_end(key)
+            return _FIT_CACHE[key]
+
+    model = None
+    path = None
+    if cache_dir is not None:
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        path = Path(cache_dir) / f"fit_{name}.pkl"
+        try:
+            with open(path, "rb") as fh:
+                model = pickle.load(fh)
+        except Exception:
+            model = None
+
+    if model is None:
+        model = fit()
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "wb") as fh:
+                    pickle.dump(model, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                pass
+
+    with _FIT_CACHE_LOCK:
+        _FIT_CACHE[key] = model
+        while len(_FIT_CACHE) > FIT_CACHE_SIZE:
+            _FIT_CACHE.popitem(last=False)
+    return model
+
 
 def prepare_series(df: pd.DataFrame, freq: str | None = "D") -> pd.Series:
     """
@@ -10,13 +78,12 @@ def prepare_series(df: pd.DataFrame, freq: str | None = "D") -> pd.Series:
     Convierte Valor (egreso negativo) a MONTO positivo y agrega por FECHA.
     Si freq != None, reindexa a esa frecuencia y completa faltantes con 0.
     """
-    dff = df.copy()
-
-    # MONTO positivo para modelar magnitud de egresos
-    dff["MONTO"] = (-dff["Valor"]).astype(float)
-
-    s = dff.groupby("FECHA")["MONTO"].sum().sort_index()
-    s.index = pd.to_datetime(s.index)
+    # MONTO positivo para modelar magnitud de egresos: se niega el agregado (una fila
+    # por fecha) en vez de copiar df y agregarle una columna temporal
+    s = df.groupby("FECHA", sort=True)["Valor"].sum().astype(np.float64).mul(-1.0)
+    # FECHA ya llega como datetime64 desde el ETL: solo convertir si no lo es
+    if s.index.dtype.kind != "M":
+        s.index = pd.to_datetime(s.index)
 
     if freq is not None:
         idx = pd.date_range(start=s.index.min(), end=s.index.max(), freq=freq)
@@ -25,47 +92,68 @@ def prepare_series(df: pd.DataFrame, freq: str | None = "D") -> pd.Series:
     return s
 
 
-def forecast_holt_winters(series: pd.Series, steps: int = 30, seasonal_periods: int | None = 7):
+def forecast_holt_winters(
+    series: pd.Series,
+    steps: int = 30,
+    seasonal_periods: int | None = 7,
+    cache_dir: str | Path | None = None,
+):
     """
     Holt-Winters:
     - Diseñado para serie diaria si seasonal_periods=7
     - Si no hay datos suficientes para estacionalidad, cae a modelo sin estacionalidad
+    - El modelo ajustado se cachea por (contenido de la serie, parámetros)
     """
     y = series.copy()
 
     n = len(y)
     if seasonal_periods is not None and n >= 2 * seasonal_periods:
-        model = ExponentialSmoothing(
-            y,
-            trend="add",
-            seasonal="add",
-            seasonal_periods=seasonal_periods
-        ).fit(optimized=True)
+        model = _cached_fit(
+            ("hw", "add", seasonal_periods, HW_FIT_METHOD, *_series_key(y)),
+            lambda: ExponentialSmoothing(
+                y,
+                trend="add",
+                seasonal="add",
+                seasonal_periods=seasonal_periods
+            ).fit(optimized=True, method=HW_FIT_METHOD, use_brute=False, minimize_kwargs=HW_MINIMIZE_KWARGS),
+            cache_dir,
+        )
         return y, model.forecast(steps)
 
     # fallback sin estacionalidad
-    model = ExponentialSmoothing(
-        y,
-        trend="add",
-        seasonal=None
-    ).fit(optimized=True)
+    model = _cached_fit(
+        ("hw", None, None, HW_FIT_METHOD, *_series_key(y)),
+        lambda: ExponentialSmoothing(
+            y,
+            trend="add",
+            seasonal=None
+        ).fit(optimized=True, method=HW_FIT_METHOD, use_brute=False, minimize_kwargs=HW_MINIMIZE_KWARGS),
+        cache_dir,
+    )
     return y, model.forecast(steps)
 
 
-def forecast_sarima(series: pd.Series, steps: int = 30, s: int = 7):
+def forecast_sarima(series: pd.Series, steps: int = 30, s: int = 7, cache_dir: str | Path | None = None):
     """
     SARIMA para serie diaria:
     - s=7 captura patrón semanal
+    - El modelo ajustado se cachea por (contenido de la serie, parámetros)
+    - low_memory=True: no guarda las matrices del filtro por período (decenas de MB
+      por modelo), que get_forecast no necesita
     """
     y = series.copy()
 
-    model = SARIMAX(
-        y,
-        order=(1, 1, 1),
-        seasonal_order=(1, 1, 1, s),
-        enforce_stationarity=False,
-        enforce_invertibility=False
-    ).fit(disp=False)
+    model = _cached_fit(
+        ("sarima", (1, 1, 1), (1, 1, 1, s), "low_memory", *_series_key(y)),
+        lambda: SARIMAX(
+            y,
+            order=(1, 1, 1),
+            seasonal_order=(1, 1, 1, s),
+            enforce_stationarity=False,
+            enforce_invertibility=False
+        ).fit(disp=False, low_memory=True),
+        cache_dir,
+    )
 
     fcst = model.get_forecast(steps=steps).predicted_mean
     return y, fcst